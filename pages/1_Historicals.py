@@ -1,9 +1,14 @@
+import re
+
 import streamlit as st
 import pandas as pd
 
-from streamlit_app.helpers.API_helpers import get_financial_statement
+from streamlit_app.helpers.API_helpers import fetch_all_statements
 from streamlit_app.helpers.excel_helpers import create_excel_file
 
+# Valid ticker symbols: 1-6 uppercase letters, dots, or dashes
+TICKER_RE = re.compile(r"[A-Z.\-]{1,6}")
+
 def transform_income_statement(df):
     df = df.set_index('date')
     df = df.drop(columns=[
@@ -40,12 +45,12 @@ st.title("📜 Historical Financials")
 ticker = st.text_input("Enter a stock ticker (e.g., AAPL, MSFT)")
 
 if st.button("Download Financials"):
-    if ticker:
+    ticker = ticker.strip().upper()
+    # Reject malformed tickers before spending any FMP round-trips on them
+    if TICKER_RE.fullmatch(ticker):
         # ADDING SPINNER HERE ✅
         with st.spinner('Loading financial data...'):
-            income_df = get_financial_statement(ticker, "income-statement")
-            balance_df = get_financial_statement(ticker, "balance-sheet-statement")
-            cashflow_df = get_financial_statement(ticker, "cash-flow-statement")
+            income_df, balance_df, cashflow_df = fetch_all_statements(ticker)
 
         if income_df is not None and balance_df is not None and cashflow_df is not None:
             # Transform the pulled financials
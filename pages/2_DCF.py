@@ -1,3 +1,5 @@
+import re
+
 import streamlit as st
 import pandas as pd
 import requests
@@ -6,46 +8,36 @@ from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.utils import get_column_letter
 
-from streamlit_app.helpers.API_helpers import get_financial_statement
+from streamlit_app.helpers.API_helpers import fetch_all_statements
+
+# Valid ticker symbols: 1-6 uppercase letters, dots, or dashes
+TICKER_RE = re.compile(r"[A-Z.\-]{1,6}")
 
 # -------------------------
 # Helper Functions
 # -------------------------
 
-def transform_income_statement(df):
+def _clean(df):
     df = df.set_index('date')
     df = df.drop(columns=[
         'symbol', 'reportedCurrency', 'cik', 'fillingDate', 'acceptedDate',
         'calendarYear', 'period', 'link', 'finalLink'
     ], errors='ignore')
-    df = df.transpose()
-    df = df[df.columns[::-1]]
-    return df
+    df.index = pd.to_datetime(df.index)
+    return df.sort_index()  # Rows oldest -> newest, fields as columns
+
+def transform_income_statement(df):
+    return _clean(df)
 
 def transform_balance_sheet(df):
-    df = df.set_index('date')
-    df = df.drop(columns=[
-        'symbol', 'reportedCurrency', 'cik', 'fillingDate', 'acceptedDate',
-        'calendarYear', 'period', 'link', 'finalLink'
-    ], errors='ignore')
-    df = df.transpose()
-    df = df[df.columns[::-1]]
-    return df
+    return _clean(df)
 
 def transform_cash_flow(df):
-    df = df.set_index('date')
-    df = df.drop(columns=[
-        'symbol', 'reportedCurrency', 'cik', 'fillingDate', 'acceptedDate',
-        'calendarYear', 'period', 'link', 'finalLink'
-    ], errors='ignore')
-    df = df.transpose()
-    df = df[df.columns[::-1]]
-    return df
+    return _clean(df)
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def pull_historical_data(ticker):
-    income_statement = get_financial_statement(ticker, "income-statement")
-    balance_sheet = get_financial_statement(ticker, "balance-sheet-statement")
-    cash_flow = get_financial_statement(ticker, "cash-flow-statement")
+    income_statement, balance_sheet, cash_flow = fetch_all_statements(ticker)
 
     income_statement = transform_income_statement(income_statement)
     balance_sheet = transform_balance_sheet(balance_sheet)
@@ -53,6 +45,51 @@ def pull_historical_data(ticker):
 
     return income_statement, balance_sheet, cash_flow
 
+# Forecast-sheet rows that link straight to the Income Statement sheet,
+# as (forecast row label, income statement field) pairs
+HISTORICAL_LINKS = [
+    ("Revenue", "revenue"),
+    ("COGS", "costOfRevenue"),
+    ("Gross Profit", "grossProfit"),
+    ("Operating Income", "operatingIncome"),
+    ("Income Tax", "incomeTaxExpense"),
+    ("Net Income", "netIncome"),
+]
+
+# Margin rows derived in-sheet, as (forecast row label, numerator row) pairs
+DERIVED_MARGINS = [
+    ("Gross Margin %", "Gross Profit"),
+    ("Operating Margin %", "Operating Income"),
+    ("Net Income Margin %", "Net Income"),
+]
+
+# Row labels on the DCF Forecast sheet, in sheet order
+DCF_ROWS = (
+    "Revenue", "COGS", "Gross Profit", "Gross Margin %",
+    "Operating Costs", "Operating Income", "Operating Margin %",
+    "Income Tax", "Net Income", "Net Income Margin %", "Free Cash Flow"
+)
+
+# Forecast-column formulas, formatted with the current column {c}, the
+# previous column {p}, and the row numbers named in TEMPLATE_ROW_KEYS
+FORECAST_TEMPLATES = (
+    ("Revenue", "={p}{rev}*(1+Assumptions!B2)"),
+    ("COGS", "={c}{rev}*(1-Assumptions!B3)"),
+    ("Gross Profit", "={c}{rev}-{c}{cogs}"),
+    ("Operating Costs", "={c}{rev}*Assumptions!B4"),
+    ("Operating Income", "={c}{gp}-{c}{oc}"),
+    ("Income Tax", "={c}{oi}*Assumptions!B5"),
+    ("Net Income", "={c}{oi}-{c}{tax}"),
+    ("Free Cash Flow", "={c}{ni}+(Assumptions!B6*{c}{rev})-(Assumptions!B7*{c}{rev})"),
+)
+
+# Placeholder name -> forecast row label, resolved against row_mapping at build time
+TEMPLATE_ROW_KEYS = {
+    "rev": "Revenue", "cogs": "COGS", "gp": "Gross Profit",
+    "oc": "Operating Costs", "oi": "Operating Income",
+    "tax": "Income Tax", "ni": "Net Income",
+}
+
 # -------------------------
 # Streamlit Inputs
 # -------------------------
@@ -79,117 +116,108 @@ capex_percent = st.number_input("CapEx (% of Revenue)", value=5.0) / 100
 # -------------------------
 
 if st.button("Build DCF Model"):
-    if ticker:
-        with st.spinner("Building your DCF model..."):
-            income_df, balance_df, cashflow_df = pull_historical_data(ticker)
-
-            # Create Excel Workbook
-            wb = Workbook()
-            wb.remove(wb.active)
-
-            # Create Historical Sheets
-            def create_historical_sheet(wb, df, sheet_name):
-                ws = wb.create_sheet(title=sheet_name)
-                for r in dataframe_to_rows(df, index=True, header=True):
-                    ws.append(r)
-
-            create_historical_sheet(wb, income_df, "Income Statement")
-            create_historical_sheet(wb, balance_df, "Balance Sheet")
-            create_historical_sheet(wb, cashflow_df, "Cash Flow Statement")
-
-            # Create Assumptions Sheet
-            assumptions_ws = wb.create_sheet(title="Assumptions")
-            assumptions_ws.append(["Input", "Value"])
-            assumptions_ws.append(["Revenue Growth Rate (%)", revenue_growth])
-            assumptions_ws.append(["Gross Margin (%)", gross_margin])
-            assumptions_ws.append(["Operating Costs (% of Revenue)", operating_costs_percent])
-            assumptions_ws.append(["Tax Rate (%)", tax_rate])
-            assumptions_ws.append(["D&A (% of Revenue)", da_percent])
-            assumptions_ws.append(["CapEx (% of Revenue)", capex_percent])
-
-            # Create DCF Forecast Sheet
-            forecast_ws = wb.create_sheet(title="DCF Forecast")
-
-            lines = [
-                "Revenue", "COGS", "Gross Profit", "Gross Margin %",
-                "Operating Costs", "Operating Income", "Operating Margin %",
-                "Income Tax", "Net Income", "Net Income Margin %", "Free Cash Flow"
-            ]
-
-            years = list(income_df.columns) + [f"Forecast {i+1}" for i in range(forecast_years)]
-            forecast_ws.append(["Variable"] + years)
-
-            row_mapping = {}
-            for line in lines:
-                forecast_ws.append([line] + [""] * len(years))
-                row_mapping[line] = forecast_ws.max_row
-
-            # 🔥 Correctly find real rows
-            lookup_rows = {
-                "revenue": None,
-                "costOfRevenue": None,
-                "grossProfit": None,
-                "operatingIncome": None,
-                "incomeTaxExpense": None,
-                "netIncome": None
-            }
-
-            # Find correct row numbers
-            for row_idx, row in enumerate(income_df.index, start=3):
-                name = str(row).strip()
-                if name in lookup_rows:
-                    lookup_rows[name] = row_idx
-
-            # Fill Historical Data
-            for idx, year in enumerate(income_df.columns):
-                col_letter = get_column_letter(idx + 2)
-
-                # Revenue
-                forecast_ws[f"{col_letter}{row_mapping['Revenue']}"] = f"='Income Statement'!{col_letter}{lookup_rows['revenue']}"
-                # COGS
-                forecast_ws[f"{col_letter}{row_mapping['COGS']}"] = f"='Income Statement'!{col_letter}{lookup_rows['costOfRevenue']}"
-                # Gross Profit
-                forecast_ws[f"{col_letter}{row_mapping['Gross Profit']}"] = f"='Income Statement'!{col_letter}{lookup_rows['grossProfit']}"
-                # Gross Margin %
-                forecast_ws[f"{col_letter}{row_mapping['Gross Margin %']}"] = f"={col_letter}{row_mapping['Gross Profit']}/{col_letter}{row_mapping['Revenue']}"
-                # Operating Income
-                forecast_ws[f"{col_letter}{row_mapping['Operating Income']}"] = f"='Income Statement'!{col_letter}{lookup_rows['operatingIncome']}"
-                # Operating Margin %
-                forecast_ws[f"{col_letter}{row_mapping['Operating Margin %']}"] = f"={col_letter}{row_mapping['Operating Income']}/{col_letter}{row_mapping['Revenue']}"
-                # Income Tax
-                forecast_ws[f"{col_letter}{row_mapping['Income Tax']}"] = f"='Income Statement'!{col_letter}{lookup_rows['incomeTaxExpense']}"
-                # Net Income
-                forecast_ws[f"{col_letter}{row_mapping['Net Income']}"] = f"='Income Statement'!{col_letter}{lookup_rows['netIncome']}"
-                # Net Income Margin %
-                forecast_ws[f"{col_letter}{row_mapping['Net Income Margin %']}"] = f"={col_letter}{row_mapping['Net Income']}/{col_letter}{row_mapping['Revenue']}"
-
-            # Fill Forecast Formulas
-            for i in range(forecast_years):
-                idx = len(income_df.columns) + i
-                col_letter = get_column_letter(idx + 2)
-                prev_col = get_column_letter(idx + 1)
-
-                forecast_ws[f"{col_letter}{row_mapping['Revenue']}"] = f"={prev_col}{row_mapping['Revenue']}*(1+Assumptions!B2)"
-                forecast_ws[f"{col_letter}{row_mapping['COGS']}"] = f"={col_letter}{row_mapping['Revenue']}*(1-Assumptions!B3)"
-                forecast_ws[f"{col_letter}{row_mapping['Gross Profit']}"] = f"={col_letter}{row_mapping['Revenue']}-{col_letter}{row_mapping['COGS']}"
-                forecast_ws[f"{col_letter}{row_mapping['Operating Costs']}"] = f"={col_letter}{row_mapping['Revenue']}*Assumptions!B4"
-                forecast_ws[f"{col_letter}{row_mapping['Operating Income']}"] = f"={col_letter}{row_mapping['Gross Profit']}-{col_letter}{row_mapping['Operating Costs']}"
-                forecast_ws[f"{col_letter}{row_mapping['Income Tax']}"] = f"={col_letter}{row_mapping['Operating Income']}*Assumptions!B5"
-                forecast_ws[f"{col_letter}{row_mapping['Net Income']}"] = f"={col_letter}{row_mapping['Operating Income']}-{col_letter}{row_mapping['Income Tax']}"
-                forecast_ws[f"{col_letter}{row_mapping['Free Cash Flow']}"] = f"={col_letter}{row_mapping['Net Income']}+(Assumptions!B6*{col_letter}{row_mapping['Revenue']})-(Assumptions!B7*{col_letter}{row_mapping['Revenue']})"
-            # Save and Streamlit Download
-            output = BytesIO()
-            wb.save(output)
-            output.seek(0)
-
-            st.success(f"DCF Model for {ticker.upper()} built successfully!")
-
-            st.download_button(
-                label="📥 Download DCF Excel File",
-                data=output,
-                file_name=f"{ticker.upper()}_DCF_Model.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+    ticker = ticker.strip().upper()
+    # Reject malformed tickers before spending any FMP round-trips on them
+    if TICKER_RE.fullmatch(ticker):
+        # Skip the rebuild when nothing has changed since the last click
+        dcf_key = hash((
+            ticker.upper(), forecast_years, revenue_growth, gross_margin,
+            operating_costs_percent, tax_rate, da_percent, capex_percent
+        ))
+
+        if st.session_state.get("dcf_key") == dcf_key:
+            output = st.session_state["dcf_bytes"]
+        else:
+            with st.spinner("Building your DCF model..."):
+                income_df, balance_df, cashflow_df = pull_historical_data(ticker)
+
+                # Create Excel Workbook
+                wb = Workbook()
+                wb.remove(wb.active)
+
+                # Create Historical Sheets
+                def create_historical_sheet(wb, df, sheet_name):
+                    # Transpose at the edge so sheets keep the fields-as-rows
+                    # layout the forecast formulas link against
+                    ws = wb.create_sheet(title=sheet_name)
+                    for r in dataframe_to_rows(df.T, index=True, header=True):
+                        ws.append(r)
+
+                create_historical_sheet(wb, income_df, "Income Statement")
+                create_historical_sheet(wb, balance_df, "Balance Sheet")
+                create_historical_sheet(wb, cashflow_df, "Cash Flow Statement")
+
+                # Create Assumptions Sheet
+                assumptions_ws = wb.create_sheet(title="Assumptions")
+                assumptions_ws.append(["Input", "Value"])
+                assumptions_ws.append(["Revenue Growth Rate (%)", revenue_growth])
+                assumptions_ws.append(["Gross Margin (%)", gross_margin])
+                assumptions_ws.append(["Operating Costs (% of Revenue)", operating_costs_percent])
+                assumptions_ws.append(["Tax Rate (%)", tax_rate])
+                assumptions_ws.append(["D&A (% of Revenue)", da_percent])
+                assumptions_ws.append(["CapEx (% of Revenue)", capex_percent])
+
+                # Create DCF Forecast Sheet
+                forecast_ws = wb.create_sheet(title="DCF Forecast")
+
+                years = list(income_df.index) + [f"Forecast {i+1}" for i in range(forecast_years)]
+                forecast_ws.append(["Variable"] + years)
+
+                row_mapping = {}
+                for line in DCF_ROWS:
+                    forecast_ws.append([line] + [""] * len(years))
+                    row_mapping[line] = forecast_ws.max_row
+
+                # 🔥 Correctly find real rows
+                lookup_rows = {
+                    "revenue": None,
+                    "costOfRevenue": None,
+                    "grossProfit": None,
+                    "operatingIncome": None,
+                    "incomeTaxExpense": None,
+                    "netIncome": None
+                }
+
+                # Find correct row numbers (sheet rows are the statement fields)
+                for row_idx, row in enumerate(income_df.columns, start=3):
+                    name = str(row).strip()
+                    if name in lookup_rows:
+                        lookup_rows[name] = row_idx
+
+                # Fill Historical Data
+                for idx, year in enumerate(income_df.index):
+                    col_letter = get_column_letter(idx + 2)
+
+                    for line, source in HISTORICAL_LINKS:
+                        forecast_ws[f"{col_letter}{row_mapping[line]}"] = f"='Income Statement'!{col_letter}{lookup_rows[source]}"
+                    for line, numerator in DERIVED_MARGINS:
+                        forecast_ws[f"{col_letter}{row_mapping[line]}"] = f"={col_letter}{row_mapping[numerator]}/{col_letter}{row_mapping['Revenue']}"
+
+                # Fill Forecast Formulas
+                template_rows = {key: row_mapping[label] for key, label in TEMPLATE_ROW_KEYS.items()}
+                for i in range(forecast_years):
+                    idx = len(income_df.index) + i
+                    col_letter = get_column_letter(idx + 2)
+                    prev_col = get_column_letter(idx + 1)
+
+                    for line, template in FORECAST_TEMPLATES:
+                        forecast_ws[f"{col_letter}{row_mapping[line]}"] = template.format(c=col_letter, p=prev_col, **template_rows)
+                # Save and Streamlit Download
+                output = BytesIO()
+                wb.save(output)
+                output.seek(0)
+
+            st.session_state["dcf_key"] = dcf_key
+            st.session_state["dcf_bytes"] = output
+
+        st.success(f"DCF Model for {ticker.upper()} built successfully!")
+
+        st.download_button(
+            label="📥 Download DCF Excel File",
+            data=output,
+            file_name=f"{ticker.upper()}_DCF_Model.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
 
     else:
         st.warning("Please enter a valid ticker.")
@@ -1,16 +1,48 @@
 # streamlit_app/helpers/api_helpers.py
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import pandas as pd
-from config import FMP_API_KEY
+import streamlit as st
+from requests.adapters import HTTPAdapter
 
-def get_financial_statement(ticker, statement_type):
+try:
+    from config import FMP_API_KEY as _CONFIG_FMP_API_KEY
+except ImportError:
+    _CONFIG_FMP_API_KEY = None
+
+# Prefer the environment so deployments don't need a local config.py
+FMP_API_KEY = os.environ.get("FMP_API_KEY") or _CONFIG_FMP_API_KEY
+
+# One pooled session for all FMP calls, so reruns reuse warm connections
+# instead of paying a TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+def fetch_statement_raw(ticker, statement_type):
+    # Raw FMP records, for callers that don't need a DataFrame
     url = f"https://financialmodelingprep.com/api/v3/{statement_type}/{ticker.upper()}?limit=5&apikey={FMP_API_KEY}"
-    response = requests.get(url)
+    response = _SESSION.get(url)
 
     if response.status_code == 200:
-        data = response.json()
-        df = pd.DataFrame(data)
-        return df
+        return response.json()
     else:
         return None
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_financial_statement(ticker, statement_type):
+    data = fetch_statement_raw(ticker, statement_type)
+
+    if data is None:
+        return None
+    return pd.DataFrame(data)
+
+def fetch_all_statements(ticker):
+    # Fire the three statement requests in parallel, so total latency is the
+    # slowest call instead of the sum of all three
+    statements = ("income-statement", "balance-sheet-statement", "cash-flow-statement")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(get_financial_statement, ticker, s) for s in statements]
+        return tuple(f.result() for f in futures)
@@ -1,13 +1,23 @@
 # streamlit_app/helpers/excel_helpers.py
 
 import io
-import pandas as pd
+from openpyxl import Workbook
 
 def create_excel_file(income_df, balance_df, cashflow_df):
+    # Write-only mode streams each row straight to the XML writer instead of
+    # materializing the whole workbook DOM in memory first
     buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        income_df.to_excel(writer, sheet_name='Income Statement', index=False)
-        balance_df.to_excel(writer, sheet_name='Balance Sheet', index=False)
-        cashflow_df.to_excel(writer, sheet_name='Cash Flow Statement', index=False)
+    wb = Workbook(write_only=True)
+    sheets = (
+        ('Income Statement', income_df),
+        ('Balance Sheet', balance_df),
+        ('Cash Flow Statement', cashflow_df),
+    )
+    for sheet_name, df in sheets:
+        ws = wb.create_sheet(title=sheet_name)
+        ws.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            ws.append(list(row))
+    wb.save(buffer)
     buffer.seek(0)
     return buffer